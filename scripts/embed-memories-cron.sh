@@ -4,9 +4,17 @@
 LOG_FILE="$HOME/clawd/logs/embed-memories.log"
 VENV="$HOME/clawd/scripts/tts-venv/bin/activate"
 SCRIPT="$HOME/clawd/scripts/embed-memories.py"
+# embed-memories.py imports the nova_embed/ package deployed next to it
+# (see README.md for the deploy step and Python dependencies)
+PACKAGE="$(dirname "$SCRIPT")/nova_embed"
 
 echo "=== $(date -Iseconds) ===" >> "$LOG_FILE"
 source "$VENV"
+if [ ! -f "$PACKAGE/__init__.py" ]; then
+    echo "Error: $PACKAGE not found; deploy it alongside $SCRIPT" >> "$LOG_FILE"
+    echo "" >> "$LOG_FILE"
+    exit 1
+fi
 python "$SCRIPT" --source all >> "$LOG_FILE" 2>&1
 echo "Exit code: $?" >> "$LOG_FILE"
 echo "" >> "$LOG_FILE"
@@ -6,73 +6,226 @@ Usage:
     python embed-memories.py                    # Embed all sources
     python embed-memories.py --source daily_log # Embed only daily logs
     python embed-memories.py --reindex          # Drop and recreate all embeddings
+    python embed-memories.py --reindex --batch-async  # Submit reindex to the Batch API
+    python embed-memories.py --collect BATCH_ID # Store results of a finished batch
 """
 
-import os
 import sys
+import io
+import csv
 import json
 import argparse
 import hashlib
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
-import psycopg2
+import numpy as np
+import tiktoken
 from psycopg2.extras import execute_values
-import openai
+from nova_embed import EMBEDDING_MODEL, EMBEDDING_DIMENSIONS, get_client, embed, connect_db
 
 # Configuration
 MEMORY_DIR = Path.home() / "clawd" / "memory"
 MEMORY_MD = Path.home() / "clawd" / "MEMORY.md"
 CHUNK_SIZE = 1000  # Characters per chunk (with overlap)
 CHUNK_OVERLAP = 200
-EMBEDDING_MODEL = "text-embedding-3-small"
-DB_NAME = "nova_memory"
-
-def get_openai_client():
-    """Get OpenAI client with API key from environment or 1Password."""
-    api_key = os.environ.get("OPENAI_API_KEY")
-    if not api_key:
-        # Try to get from skills config
-        config_path = Path.home() / ".clawdbot" / "clawdbot.json"
-        if config_path.exists():
-            with open(config_path) as f:
-                config = json.load(f)
-                api_key = config.get("skills", {}).get("entries", {}).get("openai-image-gen", {}).get("apiKey")
-    
-    if not api_key:
-        print("Error: No OpenAI API key found", file=sys.stderr)
-        sys.exit(1)
-    
-    return openai.OpenAI(api_key=api_key)
+CHUNK_DELIMITERS = ".?!\n"  # Preferred chunk boundaries
+EMBED_MAX_TOKENS = 8000  # Per input; longer texts are split into chunks (model limit 8191)
+BATCH_MAX_ITEMS = 2048  # Inputs per embeddings request (API limit)
+BATCH_MAX_TOKENS = 280000  # Tokens per embeddings request (API limit 300K)
+INSERT_PAGE_SIZE = 1000  # Rows per multi-row INSERT
+EMBED_WORKERS = 8  # Concurrent embeddings requests
+EMBED_RPM = 3000  # Embeddings requests per minute allowed by the OpenAI tier
+EMBED_TPM = 1000000  # Embeddings tokens per minute allowed by the OpenAI tier
+BATCH_DIR = Path.home() / ".cache" / "nova_embed" / "batches"  # Batch API job manifests
 
 def chunk_text(text, chunk_size=CHUNK_SIZE, overlap=CHUNK_OVERLAP):
-    """Split text into overlapping chunks."""
+    """Split text into overlapping chunks, ending each at a sentence or line break when possible."""
     chunks = []
     start = 0
-    while start < len(text):
-        end = start + chunk_size
-        chunk = text[start:end]
-        if chunk.strip():
-            chunks.append(chunk.strip())
+    length = len(text)
+    while start < length:
+        end = min(start + chunk_size, length)
+        if end < length:
+            # Back up to the last delimiter in the second half of the window
+            cut = max(text.rfind(d, start + chunk_size // 2, end) for d in CHUNK_DELIMITERS)
+            if cut != -1:
+                end = cut + 1
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        if end == length:
+            break
         start = end - overlap
     return chunks
 
-def get_embedding(client, text):
-    """Get embedding vector from OpenAI."""
-    response = client.embeddings.create(
-        model=EMBEDDING_MODEL,
-        input=text
-    )
-    return response.data[0].embedding
+class RateLimiter:
+    """Space out calls so that at most `per_minute` calls and `tokens_per_minute` tokens start in any minute."""
+    
+    def __init__(self, per_minute, tokens_per_minute):
+        self.interval = 60.0 / per_minute
+        self.token_interval = 60.0 / tokens_per_minute
+        self.lock = threading.Lock()
+        self.next_start = 0.0
+    
+    def wait(self, tokens=0):
+        with self.lock:
+            now = time.monotonic()
+            delay = self.next_start - now
+            # Each call holds back the next by its share of the request or the token budget
+            self.next_start = max(now, self.next_start) + max(self.interval, tokens * self.token_interval)
+        if delay > 0:
+            time.sleep(delay)
 
-def content_hash(text):
-    """Hash content to detect changes."""
-    return hashlib.md5(text.encode()).hexdigest()[:16]
+rate_limiter = RateLimiter(EMBED_RPM, EMBED_TPM)
+encoding = tiktoken.encoding_for_model(EMBEDDING_MODEL)
 
-def embed_daily_logs(conn, client, force=False):
-    """Embed daily memory log files."""
-    cur = conn.cursor()
+def get_embeddings(client, texts, n_tokens=0):
+    """Get embedding vectors from OpenAI for a batch of texts (one request of n_tokens tokens).
+
+    Returns a float32 array of shape (len(texts), dimensions), one row per text.
+    """
+    rate_limiter.wait(n_tokens)
+    return embed(texts, client)
+
+def fit_items(items):
+    """Yield (item, token_count) for each (source_id, content, content_hash) item.
+
+    Items over the per-input token limit are split at sentence boundaries into
+    f"{source_id}:chunk{i}" items, like the file sources, rather than truncated
+    (stored_hashes() and delete_embeddings() strip the suffix).
+    """
+    for item in items:
+        source_id, content, digest = item
+        n_tokens = len(encoding.encode(content, disallowed_special=()))
+        if n_tokens <= EMBED_MAX_TOKENS:
+            yield item, n_tokens
+            continue
+        # A CHUNK_SIZE-character chunk is always well under the token limit
+        chunks = chunk_text(content)
+        print(f"  Splitting {source_id} ({n_tokens} tokens) into {len(chunks)} chunks")
+        for i, chunk in enumerate(chunks):
+            yield (f"{source_id}:chunk{i}", chunk, digest), len(encoding.encode(chunk, disallowed_special=()))
+
+def batch_items(items, max_items=BATCH_MAX_ITEMS, max_tokens=BATCH_MAX_TOKENS):
+    """Group (source_id, content, ...) items into batches for a single embeddings request.
+
+    Yields (batch, token_count) pairs. Oversized items are split first (see
+    fit_items()), so a batch may hold chunk items in place of the original.
+    """
+    batch = []
+    batch_tokens = 0
+    for item, n_tokens in fit_items(items):
+        if batch and (len(batch) >= max_items or batch_tokens + n_tokens > max_tokens):
+            yield batch, batch_tokens
+            batch = []
+            batch_tokens = 0
+        batch.append(item)
+        batch_tokens += n_tokens
+    if batch:
+        yield batch, batch_tokens
+
+def insert_rows(cur, rows):
+    """Insert (source_type, source_id, content, embedding, content_hash) rows in bulk."""
+    execute_values(cur, """
+        INSERT INTO memory_embeddings (source_type, source_id, content, embedding, content_hash)
+        VALUES %s
+        ON CONFLICT DO NOTHING
+    """, rows, page_size=INSERT_PAGE_SIZE)
+
+def copy_rows(cur, rows):
+    """Bulk-load (source_type, source_id, content, embedding, content_hash) rows with COPY.
+
+    Only for rows whose sources were just cleared: COPY has no ON CONFLICT.
+    """
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for source_type, source_id, content, embedding, digest in rows:
+        vector = "[" + ",".join(map(str, embedding)) + "]"
+        writer.writerow((source_type, source_id, content, vector, digest))
+    buf.seek(0)
+    cur.copy_expert("""
+        COPY memory_embeddings (source_type, source_id, content, embedding, content_hash)
+        FROM STDIN WITH (FORMAT csv)
+    """, buf)
+
+def embed_items(cur, client, source_type, items, copy=False):
+    """Embed an iterable of (source_id, content, content_hash) items in batches and insert them.
+
+    Batches are embedded concurrently on a thread pool; results are inserted
+    in order from this thread, which owns the cursor. With copy=True rows are
+    bulk-loaded with COPY (reindex path, where old rows were already deleted).
+    """
+    write_rows = copy_rows if copy else insert_rows
     count = 0
+    rows = []
+    in_flight = deque()
+    
+    def collect(batch, future):
+        for (source_id, content, digest), embedding in zip(batch, future.result()):
+            rows.append((source_type, source_id, content, embedding, digest))
     
+    with ThreadPoolExecutor(max_workers=EMBED_WORKERS) as pool:
+        for batch, n_tokens in batch_items(items):
+            future = pool.submit(get_embeddings, client, [content for _, content, _ in batch], n_tokens)
+            in_flight.append((batch, future))
+            # Bound the number of outstanding batches held in memory
+            if len(in_flight) >= 2 * EMBED_WORKERS:
+                collect(*in_flight.popleft())
+            if len(rows) >= INSERT_PAGE_SIZE:
+                write_rows(cur, rows)
+                count += len(rows)
+                rows.clear()
+        while in_flight:
+            collect(*in_flight.popleft())
+    
+    if rows:
+        write_rows(cur, rows)
+        count += len(rows)
+    return count
+
+def content_hash(text):
+    """Hash content to detect changes (not for security)."""
+    return hashlib.blake2b(text.encode(), digest_size=8).hexdigest()
+
+def stored_hashes(cur, source_type):
+    """Map each embedded source (chunk suffix stripped) to its stored content hashes."""
+    cur.execute(
+        "SELECT DISTINCT source_id, content_hash FROM memory_embeddings WHERE source_type = %s",
+        (source_type,)
+    )
+    existing = {}
+    for source_id, digest in cur.fetchall():
+        existing.setdefault(source_id.split(":chunk")[0], set()).add(digest)
+    return existing
+
+def delete_embeddings(cur, source_type, source_ids=None):
+    """Delete stored embeddings (all chunks) for the given sources in one statement.
+
+    With source_ids=None every embedding of the type is deleted (reindex).
+    """
+    if source_ids is None:
+        cur.execute("DELETE FROM memory_embeddings WHERE source_type = %s", (source_type,))
+    elif source_ids:
+        # Exact match on the id with any ':chunkN' suffix stripped, as in stored_hashes();
+        # a LIKE pattern would treat '_' and '%' in file names as wildcards
+        cur.execute("""
+            DELETE FROM memory_embeddings
+            WHERE source_type = %s AND split_part(source_id, ':chunk', 1) = ANY(%s::text[])
+        """, (source_type, list(source_ids)))
+
+def daily_log_items(cur, existing, force=False):
+    """Yield (source_id, content, content_hash) chunks for new or changed daily logs.
+
+    Files are hashed up front so stale embeddings can be deleted in one
+    statement, then read again lazily as the embedder consumes chunks, so only
+    the current file and the in-flight batches are held in memory.
+    """
+    changed = []
+    stale = []
     for log_file in sorted(MEMORY_DIR.glob("*.md")):
         source_id = log_file.name
         content = log_file.read_text()
@@ -80,244 +233,435 @@ def embed_daily_logs(conn, client, force=False):
         if not content.strip():
             continue
         
-        # Check if already embedded (unless force)
-        if not force:
-            cur.execute(
-                "SELECT id FROM memory_embeddings WHERE source_type = 'daily_log' AND source_id = %s",
-                (source_id,)
-            )
-            if cur.fetchone():
-                print(f"  Skipping {source_id} (already embedded)")
-                continue
-        
-        # Chunk and embed
-        chunks = chunk_text(content)
-        for i, chunk in enumerate(chunks):
-            chunk_id = f"{source_id}:chunk{i}"
-            embedding = get_embedding(client, chunk)
-            
-            cur.execute("""
-                INSERT INTO memory_embeddings (source_type, source_id, content, embedding)
-                VALUES ('daily_log', %s, %s, %s)
-                ON CONFLICT DO NOTHING
-            """, (chunk_id, chunk, embedding))
-            count += 1
-        
-        print(f"  Embedded {source_id} ({len(chunks)} chunks)")
+        # Skip if embedded with the same content (unless force)
+        stored = existing.get(source_id)
+        if stored == {content_hash(content)} and not force:
+            print(f"  Skipping {source_id} (unchanged)")
+            continue
+        if stored:
+            stale.append(source_id)
+        changed.append(log_file)
+    
+    # On reindex clear the whole type, which also drops logs that were deleted
+    delete_embeddings(cur, "daily_log", None if force else stale)
     
+    for log_file in changed:
+        source_id = log_file.name
+        content = log_file.read_text()
+        digest = content_hash(content)
+        chunks = chunk_text(content)
+        del content  # Only the chunks are needed from here on
+        print(f"  Queued {source_id} ({len(chunks)} chunks)")
+        yield from ((f"{source_id}:chunk{i}", chunk, digest) for i, chunk in enumerate(chunks))
+
+def embed_daily_logs(conn, client, force=False):
+    """Embed daily memory log files."""
+    cur = conn.cursor()
+    items = daily_log_items(cur, stored_hashes(cur, "daily_log"), force)
+    count = embed_items(cur, client, "daily_log", items, copy=force)
     conn.commit()
+    if count:
+        print(f"  Embedded {count} daily log chunks")
     return count
 
-def embed_memory_md(conn, client, force=False):
-    """Embed MEMORY.md file."""
-    cur = conn.cursor()
-    
+def memory_md_items(cur, existing, force=False):
+    """Collect (source_id, content, content_hash) chunks for MEMORY.md if it changed."""
     if not MEMORY_MD.exists():
-        return 0
+        return []
     
     content = MEMORY_MD.read_text()
     source_id = "MEMORY.md"
     
-    # Check if already embedded
-    if not force:
-        cur.execute(
-            "SELECT id FROM memory_embeddings WHERE source_type = 'memory_md' AND source_id LIKE %s",
-            (f"{source_id}%",)
-        )
-        if cur.fetchone():
-            print(f"  Skipping {source_id} (already embedded)")
-            return 0
-    else:
+    # Skip if embedded with the same content (unless force)
+    digest = content_hash(content)
+    stored = existing.get(source_id)
+    if stored == {digest} and not force:
+        print(f"  Skipping {source_id} (unchanged)")
+        return []
+    if force:
+        delete_embeddings(cur, "memory_md")
+    elif stored:
         # Delete old embeddings for this file
-        cur.execute("DELETE FROM memory_embeddings WHERE source_type = 'memory_md'")
+        delete_embeddings(cur, "memory_md", [source_id])
     
     chunks = chunk_text(content)
-    count = 0
-    for i, chunk in enumerate(chunks):
-        chunk_id = f"{source_id}:chunk{i}"
-        embedding = get_embedding(client, chunk)
-        
-        cur.execute("""
-            INSERT INTO memory_embeddings (source_type, source_id, content, embedding)
-            VALUES ('memory_md', %s, %s, %s)
-        """, (chunk_id, chunk, embedding))
-        count += 1
+    return [(f"{source_id}:chunk{i}", chunk, digest) for i, chunk in enumerate(chunks)]
+
+def embed_memory_md(conn, client, force=False):
+    """Embed MEMORY.md file."""
+    cur = conn.cursor()
+    pending = memory_md_items(cur, stored_hashes(cur, "memory_md"), force)
+    if not pending:
+        return 0
     
+    count = embed_items(cur, client, "memory_md", pending, copy=force)
     conn.commit()
-    print(f"  Embedded {source_id} ({count} chunks)")
+    print(f"  Embedded MEMORY.md ({count} chunks)")
     return count
 
-def embed_lessons(conn, client, force=False):
-    """Embed lessons from database."""
-    cur = conn.cursor()
-    
+def lesson_items(cur, existing, force=False):
+    """Collect (source_id, content, content_hash) items for new or changed lessons."""
     cur.execute("SELECT id, lesson, context FROM lessons")
     lessons = cur.fetchall()
     
-    count = 0
+    pending = []
+    stale = []
     for lesson_id, lesson, context in lessons:
         source_id = f"lesson:{lesson_id}"
         
-        if not force:
-            cur.execute(
-                "SELECT id FROM memory_embeddings WHERE source_type = 'lesson' AND source_id = %s",
-                (source_id,)
-            )
-            if cur.fetchone():
-                continue
-        
         content = f"Lesson: {lesson}"
         if context:
             content += f"\nContext: {context}"
         
-        embedding = get_embedding(client, content)
+        digest = content_hash(content)
+        stored = existing.get(source_id)
+        if stored == {digest} and not force:
+            continue
+        if stored:
+            stale.append(source_id)
         
-        cur.execute("""
-            INSERT INTO memory_embeddings (source_type, source_id, content, embedding)
-            VALUES ('lesson', %s, %s, %s)
-            ON CONFLICT DO NOTHING
-        """, (source_id, content, embedding))
-        count += 1
+        pending.append((source_id, content, digest))
     
+    # On reindex clear the whole type, which also drops deleted lessons
+    delete_embeddings(cur, "lesson", None if force else stale)
+    return pending
+
+def embed_lessons(conn, client, force=False):
+    """Embed lessons from database."""
+    cur = conn.cursor()
+    pending = lesson_items(cur, stored_hashes(cur, "lesson"), force)
+    count = embed_items(cur, client, "lesson", pending, copy=force)
     conn.commit()
     if count:
         print(f"  Embedded {count} lessons")
     return count
 
-def embed_events(conn, client, force=False):
-    """Embed events from database."""
-    cur = conn.cursor()
+def event_items(cur, existing, force=False):
+    """Collect (source_id, content, content_hash) items for new or changed events.
+
+    Only events inserted after the newest embedded one (by id) are scanned, so
+    new events are found whatever their event_date, including back-dated or
+    undated ones; edits to already embedded events are picked up by --reindex
+    rather than every run.
+    """
+    # Scan everything on first run, reindex, or batch submission
+    last_id = None
+    if existing and not force:
+        cur.execute("""
+            SELECT MAX(e.id)
+            FROM memory_embeddings em
+            JOIN events e ON split_part(em.source_id, ':chunk', 1) = 'event:' || e.id
+            WHERE em.source_type = 'event'
+        """)
+        last_id = cur.fetchone()[0]
     
-    cur.execute("SELECT id, title, description, event_date FROM events ORDER BY event_date DESC LIMIT 100")
+    if last_id is None:
+        cur.execute("SELECT id, title, description, event_date FROM events ORDER BY id")
+    else:
+        cur.execute(
+            "SELECT id, title, description, event_date FROM events WHERE id > %s ORDER BY id",
+            (last_id,)
+        )
     events = cur.fetchall()
     
-    count = 0
+    pending = []
+    stale = []
     for event_id, title, description, event_date in events:
         source_id = f"event:{event_id}"
         
-        if not force:
-            cur.execute(
-                "SELECT id FROM memory_embeddings WHERE source_type = 'event' AND source_id = %s",
-                (source_id,)
-            )
-            if cur.fetchone():
-                continue
-        
         content = f"Event ({event_date}): {title}"
         if description:
             content += f"\n{description}"
         
-        embedding = get_embedding(client, content)
+        digest = content_hash(content)
+        stored = existing.get(source_id)
+        if stored == {digest} and not force:
+            continue
+        if stored:
+            stale.append(source_id)
         
-        cur.execute("""
-            INSERT INTO memory_embeddings (source_type, source_id, content, embedding)
-            VALUES ('event', %s, %s, %s)
-            ON CONFLICT DO NOTHING
-        """, (source_id, content, embedding))
-        count += 1
+        pending.append((source_id, content, digest))
     
+    # On reindex clear the whole type, which also drops deleted events
+    delete_embeddings(cur, "event", None if force else stale)
+    return pending
+
+def embed_events(conn, client, force=False):
+    """Embed events from database."""
+    cur = conn.cursor()
+    pending = event_items(cur, stored_hashes(cur, "event"), force)
+    count = embed_items(cur, client, "event", pending, copy=force)
     conn.commit()
     if count:
         print(f"  Embedded {count} events")
     return count
 
-def embed_sops(conn, client, force=False):
-    """Embed SOPs (Standard Operating Procedures) from database."""
-    cur = conn.cursor()
+def sop_content(name, description, steps):
+    """Build the text embedded for an SOP: name, description, and steps."""
+    parts = [f"SOP: {name}"]
+    if description:
+        parts.append(f"Description: {description}")
+    
+    # Steps can be array of strings or array of objects (possibly still JSON text)
+    if steps:
+        if isinstance(steps, str):
+            steps = json.loads(steps)
+        parts.append("Steps:")
+        for i, step in enumerate(steps, 1):
+            if isinstance(step, str):
+                parts.append(f"  {i}. {step}")
+            elif isinstance(step, dict):
+                parts.append(f"  {i}. {step.get('action', step.get('step', ''))}")
+                if 'command' in step:
+                    parts.append(f"     Command: {step['command']}")
+                if 'sql' in step:
+                    parts.append(f"     SQL: {step['sql']}")
     
+    # Trailing newline kept so content hashes match earlier runs
+    return "\n".join(parts) + "\n"
+
+def sop_items(cur, existing, force=False):
+    """Collect (source_id, content, content_hash) items for new or changed SOPs."""
     cur.execute("SELECT id, name, description, steps FROM sops")
     sops = cur.fetchall()
     
-    count = 0
+    pending = []
+    stale = []
     for sop_id, name, description, steps in sops:
         source_id = f"sop:{sop_id}"
         
-        if not force:
-            cur.execute(
-                "SELECT id FROM memory_embeddings WHERE source_type = 'sop' AND source_id = %s",
-                (source_id,)
-            )
-            if cur.fetchone():
-                continue
-        else:
-            # Delete old embedding for this SOP
-            cur.execute("DELETE FROM memory_embeddings WHERE source_type = 'sop' AND source_id = %s", (source_id,))
-        
-        # Build content: name, description, and steps
-        content = f"SOP: {name}\n"
-        if description:
-            content += f"Description: {description}\n"
-        
-        # Parse steps (can be array of strings or array of objects)
-        if steps:
-            content += "Steps:\n"
-            if isinstance(steps, str):
-                steps = json.loads(steps)
-            for i, step in enumerate(steps, 1):
-                if isinstance(step, str):
-                    content += f"  {i}. {step}\n"
-                elif isinstance(step, dict):
-                    action = step.get('action', step.get('step', ''))
-                    content += f"  {i}. {action}\n"
-                    if 'command' in step:
-                        content += f"     Command: {step['command']}\n"
-                    if 'sql' in step:
-                        content += f"     SQL: {step['sql']}\n"
-        
-        embedding = get_embedding(client, content)
+        content = sop_content(name, description, steps)
+        digest = content_hash(content)
+        stored = existing.get(source_id)
+        if stored == {digest} and not force:
+            continue
+        if stored:
+            stale.append(source_id)
         
-        cur.execute("""
-            INSERT INTO memory_embeddings (source_type, source_id, content, embedding)
-            VALUES ('sop', %s, %s, %s)
-            ON CONFLICT DO NOTHING
-        """, (source_id, content, embedding))
-        count += 1
-        print(f"  Embedded SOP: {name}")
+        pending.append((source_id, content, digest))
+        print(f"  Queued SOP: {name}")
     
+    # On reindex clear the whole type, which also drops deleted SOPs
+    delete_embeddings(cur, "sop", None if force else stale)
+    return pending
+
+def embed_sops(conn, client, force=False):
+    """Embed SOPs (Standard Operating Procedures) from database."""
+    cur = conn.cursor()
+    pending = sop_items(cur, stored_hashes(cur, "sop"), force)
+    count = embed_items(cur, client, "sop", pending, copy=force)
     conn.commit()
     if count:
         print(f"  Embedded {count} SOPs total")
     return count
 
+SOURCE_ITEMS = {
+    "daily_log": daily_log_items,
+    "memory_md": memory_md_items,
+    "lesson": lesson_items,
+    "event": event_items,
+    "sop": sop_items,
+}
+
+def submit_batch(conn, client, source_types):
+    """Submit a full re-embed of the given sources as an OpenAI Batch API job.
+
+    Nothing is written to the database here; run again with --collect once
+    the job has completed. The chunk contents are kept in a local manifest so
+    results can be matched back up by custom_id.
+    """
+    cur = conn.cursor()
+    BATCH_DIR.mkdir(parents=True, exist_ok=True)
+    requests_path = BATCH_DIR / "requests.jsonl"
+    manifest = []
+    
+    with open(requests_path, "w") as f:
+        for source_type in source_types:
+            print(f"\nCollecting {source_type}...")
+            # An empty existing map yields every source without touching stored rows
+            for (source_id, content, digest), _ in fit_items(SOURCE_ITEMS[source_type](cur, {})):
+                custom_id = f"{source_type}|{source_id}"
+                f.write(json.dumps({
+                    "custom_id": custom_id,
+                    "method": "POST",
+                    "url": "/v1/embeddings",
+                    "body": {
+                        "model": EMBEDDING_MODEL,
+                        "dimensions": EMBEDDING_DIMENSIONS,
+                        "input": content,
+                    },
+                }) + "\n")
+                manifest.append({
+                    "custom_id": custom_id,
+                    "source_type": source_type,
+                    "source_id": source_id,
+                    "content": content,
+                    "content_hash": digest,
+                })
+    
+    if not manifest:
+        print("\nNothing to submit.")
+        return None
+    
+    with open(requests_path, "rb") as f:
+        input_file = client.files.create(file=f, purpose="batch")
+    batch = client.batches.create(
+        input_file_id=input_file.id,
+        endpoint="/v1/embeddings",
+        completion_window="24h",
+    )
+    
+    with open(BATCH_DIR / f"{batch.id}.jsonl", "w") as f:
+        for entry in manifest:
+            f.write(json.dumps(entry) + "\n")
+    requests_path.unlink()
+    
+    print(f"\nSubmitted batch {batch.id} ({len(manifest)} chunks).")
+    print(f"Collect it with: embed-memories.py --collect {batch.id}")
+    return batch.id
+
+def collect_batch(conn, client, batch_id):
+    """Store the results of a completed Batch API job, replacing the reindexed sources."""
+    manifest_path = BATCH_DIR / f"{batch_id}.jsonl"
+    if not manifest_path.exists():
+        print(f"Error: No manifest for batch {batch_id} in {BATCH_DIR}", file=sys.stderr)
+        sys.exit(1)
+    
+    batch = client.batches.retrieve(batch_id)
+    if batch.status != "completed":
+        print(f"Batch {batch_id} is {batch.status}, not ready to collect.")
+        return 0
+    
+    with open(manifest_path) as f:
+        manifest = {entry["custom_id"]: entry for entry in map(json.loads, f)}
+    
+    embeddings = {}
+    output = client.files.content(batch.output_file_id).text if batch.output_file_id else ""
+    for line in output.splitlines():
+        result = json.loads(line)
+        response = result.get("response")
+        if response and response["status_code"] == 200:
+            embeddings[result["custom_id"]] = response["body"]["data"][0]["embedding"]
+    
+    # Every request failed: keep the existing index rather than emptying it
+    if not embeddings:
+        print(f"Error: Batch {batch_id} returned no embeddings (error file: {batch.error_file_id}); "
+              "nothing was changed.", file=sys.stderr)
+        return 0
+    
+    # A source is replaced only if every one of its chunks came back; otherwise
+    # it keeps its old rows (a partial set would look unchanged to later runs)
+    failed = {
+        (entry["source_type"], entry["source_id"].split(":chunk")[0])
+        for custom_id, entry in manifest.items() if custom_id not in embeddings
+    }
+    rows = []
+    for custom_id, entry in manifest.items():
+        if (entry["source_type"], entry["source_id"].split(":chunk")[0]) in failed:
+            continue
+        rows.append((
+            entry["source_type"],
+            entry["source_id"],
+            entry["content"],
+            np.asarray(embeddings[custom_id], dtype=np.float32),
+            entry["content_hash"],
+        ))
+    
+    # Replace each reindexed source type, except the sources that failed
+    cur = conn.cursor()
+    for source_type in sorted({entry["source_type"] for entry in manifest.values()}):
+        keep = [source_id for failed_type, source_id in failed if failed_type == source_type]
+        cur.execute("""
+            DELETE FROM memory_embeddings
+            WHERE source_type = %s AND split_part(source_id, ':chunk', 1) <> ALL(%s::text[])
+        """, (source_type, keep))
+    copy_rows(cur, rows)
+    conn.commit()
+    
+    if failed:
+        # Keep the manifest so the job can still be inspected or collected again
+        print(f"  {len(failed)} sources had failed chunks and kept their previous embeddings "
+              f"(error file: {batch.error_file_id}).")
+        print(f"  Re-run --reindex to retry them; manifest kept at {manifest_path}.")
+    else:
+        manifest_path.unlink()
+    return len(rows)
+
+def ensure_schema(conn):
+    """Apply idempotent schema migrations to the memory tables."""
+    cur = conn.cursor()
+    cur.execute("ALTER TABLE memory_embeddings ADD COLUMN IF NOT EXISTS content_hash text")
+    
+    # ANN index so search/recall traverse HNSW instead of scanning every row
+    # (connect_db() has already migrated the column to halfvec)
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS memory_embeddings_embedding_hnsw_idx
+        ON memory_embeddings USING hnsw (embedding halfvec_cosine_ops)
+        WITH (m = 16, ef_construction = 64)
+    """)
+    conn.commit()
+
 def main():
     parser = argparse.ArgumentParser(description="Embed memories for semantic search")
     parser.add_argument("--source", choices=["daily_log", "memory_md", "lesson", "event", "sop", "all"], 
                         default="all", help="Which source to embed")
     parser.add_argument("--reindex", action="store_true", help="Force re-embed everything")
+    parser.add_argument("--batch-async", action="store_true",
+                        help="With --reindex, submit an OpenAI Batch API job (50%% cheaper, up to 24h)")
+    parser.add_argument("--collect", metavar="BATCH_ID", help="Store the results of a completed batch job")
     args = parser.parse_args()
+    if args.batch_async and not args.reindex:
+        parser.error("--batch-async requires --reindex")
     
     print("Connecting to database...")
-    conn = psycopg2.connect(dbname=DB_NAME, host="localhost", user="nova")
+    conn = connect_db()
+    ensure_schema(conn)
     
     print("Initializing OpenAI client...")
-    client = get_openai_client()
-    
-    total = 0
-    
-    if args.source in ["daily_log", "all"]:
-        print("\nEmbedding daily logs...")
-        total += embed_daily_logs(conn, client, args.reindex)
+    client = get_client()
+    if not client:
+        print("Error: No OpenAI API key found", file=sys.stderr)
+        sys.exit(1)
     
-    if args.source in ["memory_md", "all"]:
-        print("\nEmbedding MEMORY.md...")
-        total += embed_memory_md(conn, client, args.reindex)
+    if args.batch_async:
+        source_types = list(SOURCE_ITEMS) if args.source == "all" else [args.source]
+        submit_batch(conn, client, source_types)
+        conn.close()
+        return
     
-    if args.source in ["lesson", "all"]:
-        print("\nEmbedding lessons...")
-        total += embed_lessons(conn, client, args.reindex)
+    total = 0
     
-    if args.source in ["event", "all"]:
-        print("\nEmbedding events...")
-        total += embed_events(conn, client, args.reindex)
+    if args.collect:
+        print(f"\nCollecting batch {args.collect}...")
+        total += collect_batch(conn, client, args.collect)
     
-    if args.source in ["sop", "all"]:
-        print("\nEmbedding SOPs...")
-        total += embed_sops(conn, client, args.reindex)
+    else:
+        if args.source in ["daily_log", "all"]:
+            print("\nEmbedding daily logs...")
+            total += embed_daily_logs(conn, client, args.reindex)
+        
+        if args.source in ["memory_md", "all"]:
+            print("\nEmbedding MEMORY.md...")
+            total += embed_memory_md(conn, client, args.reindex)
+        
+        if args.source in ["lesson", "all"]:
+            print("\nEmbedding lessons...")
+            total += embed_lessons(conn, client, args.reindex)
+        
+        if args.source in ["event", "all"]:
+            print("\nEmbedding events...")
+            total += embed_events(conn, client, args.reindex)
+        
+        if args.source in ["sop", "all"]:
+            print("\nEmbedding SOPs...")
+            total += embed_sops(conn, client, args.reindex)
     
     print(f"\nDone! Embedded {total} chunks total.")
     
-    # Show stats
+    # Refresh planner statistics, then show stats
     cur = conn.cursor()
+    cur.execute("ANALYZE memory_embeddings")
+    conn.commit()
     cur.execute("SELECT source_type, COUNT(*) FROM memory_embeddings GROUP BY source_type")
     print("\nEmbedding stats:")
     for source_type, count in cur.fetchall():
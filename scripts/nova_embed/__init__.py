@@ -0,0 +1,198 @@
+"""
+Shared embedding pipeline for the memory scripts.
+
+embed-memories.py, semantic-search.py and proactive-recall.py all import
+from here: OpenAI client setup, embedding calls (with an on-disk cache for
+queries), the database connection, and the nearest-neighbour query.
+
+connect_db() migrates the embedding column to EMBEDDING_DIMENSIONS on first
+use, so search and recall work right after an upgrade, before the next
+embed-memories.py run.
+
+Third-party packages (openai, httpx, numpy, psycopg2, pgvector) are imported
+inside the functions that use them, so importing this module stays cheap.
+"""
+
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import functools
+import importlib.util
+from pathlib import Path
+
+EMBEDDING_MODEL = "text-embedding-3-small"
+EMBEDDING_DIMENSIONS = 512  # Shortened embeddings, stored as halfvec
+DB_NAME = "nova_memory"
+MAX_RETRIES = 5  # Client retries (exponential backoff) on 429/5xx
+HTTP_MAX_CONNECTIONS = 32  # Pooled keep-alive connections to the OpenAI API
+QUERY_CACHE_PATH = Path.home() / ".cache" / "nova_embed" / "query_cache.sqlite"
+QUERY_CACHE_SIZE = 10000  # Most recently used query embeddings to keep
+HNSW_EF_SEARCH = 40  # HNSW candidate list size per query
+HNSW_EF_SEARCH_MAX = 1000  # Largest hnsw.ef_search pgvector accepts
+
+@functools.lru_cache(maxsize=None)
+def get_client():
+    """Get the OpenAI client (API key from environment or Clawdbot config), or None.
+
+    Cached, so long-running callers read the config and build the client once.
+    """
+    api_key = os.environ.get("OPENAI_API_KEY")
+    if not api_key:
+        # Try to get from skills config
+        config_path = Path.home() / ".clawdbot" / "clawdbot.json"
+        if config_path.exists():
+            with open(config_path) as f:
+                config = json.load(f)
+                api_key = config.get("skills", {}).get("entries", {}).get("openai-image-gen", {}).get("apiKey")
+    
+    if not api_key:
+        return None
+    
+    import httpx
+    import openai
+    
+    # One pooled keep-alive client for every request; HTTP/2 when h2 is installed (httpx[http2])
+    http_client = openai.DefaultHttpxClient(
+        http2=importlib.util.find_spec("h2") is not None,
+        limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS,
+                            max_keepalive_connections=HTTP_MAX_CONNECTIONS),
+    )
+    return openai.OpenAI(api_key=api_key, max_retries=MAX_RETRIES, http_client=http_client)
+
+def embed(texts, client=None):
+    """Embed a batch of texts in one request.
+
+    Returns a float32 array of shape (len(texts), dimensions), one row per text.
+    """
+    import numpy as np
+    
+    client = client or get_client()
+    response = client.embeddings.create(
+        model=EMBEDDING_MODEL,
+        dimensions=EMBEDDING_DIMENSIONS,
+        input=texts
+    )
+    return np.asarray([d.embedding for d in response.data], dtype=np.float32)
+
+def open_query_cache():
+    """Open (creating if needed) the on-disk LRU cache of query embeddings."""
+    QUERY_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+    cache = sqlite3.connect(QUERY_CACHE_PATH)
+    cache.execute("""
+        CREATE TABLE IF NOT EXISTS embeddings (
+            key TEXT PRIMARY KEY,
+            embedding TEXT NOT NULL,
+            used REAL NOT NULL
+        )
+    """)
+    cache.execute("CREATE INDEX IF NOT EXISTS embeddings_used ON embeddings (used)")
+    return cache
+
+def embed_query(text, client=None):
+    """Get a query's embedding (float32 array) from the query cache, or from OpenAI on a miss."""
+    import numpy as np
+    
+    key = hashlib.blake2b(f"{EMBEDDING_MODEL}:{EMBEDDING_DIMENSIONS}:{text}".encode(), digest_size=16).hexdigest()
+    cache = open_query_cache()
+    try:
+        row = cache.execute("SELECT embedding FROM embeddings WHERE key = ?", (key,)).fetchone()
+        if row:
+            cache.execute("UPDATE embeddings SET used = ? WHERE key = ?", (time.time(), key))
+            cache.commit()
+            return np.asarray(json.loads(row[0]), dtype=np.float32)
+        
+        embedding = embed([text], client)[0]
+        
+        cache.execute("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?)",
+                      (key, json.dumps(embedding.tolist()), time.time()))
+        cache.execute("""
+            DELETE FROM embeddings WHERE key NOT IN (
+                SELECT key FROM embeddings ORDER BY used DESC LIMIT ?
+            )
+        """, (QUERY_CACHE_SIZE,))
+        cache.commit()
+        return embedding
+    finally:
+        cache.close()
+
+def ensure_embedding_column(conn):
+    """Migrate memory_embeddings.embedding to halfvec(EMBEDDING_DIMENSIONS) if needed.
+
+    Run on every connect so search and recall never send shortened query
+    vectors to a column that still holds full-size ones. When the column is
+    already migrated this is a single catalog lookup.
+    """
+    column_type = f"halfvec({EMBEDDING_DIMENSIONS})"
+    cur = conn.cursor()
+    
+    def current_type():
+        cur.execute("""
+            SELECT format_type(atttypid, atttypmod) FROM pg_attribute
+            WHERE attrelid = 'memory_embeddings'::regclass AND attname = 'embedding'
+        """)
+        return cur.fetchone()[0]
+    
+    if current_type() == column_type:
+        conn.rollback()
+        return
+    
+    # Callers connecting at the same time would each rewrite the table: take
+    # the lock first, then check again, so only the first one migrates
+    cur.execute("LOCK TABLE memory_embeddings IN ACCESS EXCLUSIVE MODE")
+    if current_type() == column_type:
+        conn.rollback()
+        return
+    
+    # text-embedding-3 embeddings can be shortened by keeping the leading
+    # dimensions and re-normalizing, which is what the API's `dimensions`
+    # parameter does, so no re-embedding is needed.
+    cur.execute("DROP INDEX IF EXISTS memory_embeddings_embedding_hnsw_idx")
+    cur.execute(f"""
+        ALTER TABLE memory_embeddings ALTER COLUMN embedding TYPE {column_type}
+        USING l2_normalize(subvector(embedding::vector, 1, {EMBEDDING_DIMENSIONS}))::{column_type}
+    """)
+    cur.execute("""
+        CREATE INDEX memory_embeddings_embedding_hnsw_idx
+        ON memory_embeddings USING hnsw (embedding halfvec_cosine_ops)
+        WITH (m = 16, ef_construction = 64)
+    """)
+    conn.commit()
+
+def connect_db():
+    """Connect to the memory database with numpy arrays bound as pgvector values.
+
+    Also migrates the embedding column to the current dimensions if needed.
+    """
+    import psycopg2
+    from pgvector.psycopg2 import register_vector
+    
+    conn = psycopg2.connect(dbname=DB_NAME, host="localhost", user="nova")
+    register_vector(conn)
+    ensure_embedding_column(conn)
+    return conn
+
+def search_embeddings(conn, query_embedding, limit, threshold):
+    """Return (source_type, source_id, content, similarity) rows nearest the query.
+
+    conn must come from connect_db() and query_embedding be a numpy array.
+    """
+    cur = conn.cursor()
+    # Must be at least the LIMIT or the index scan can return too few rows
+    # (pgvector caps it at 1000, so larger limits may get fewer rows)
+    cur.execute("SET hnsw.ef_search = %s", (min(max(HNSW_EF_SEARCH, limit), HNSW_EF_SEARCH_MAX),))
+    # Bind the vector once (as a pgvector literal via register_vector; typed by
+    # the column, so no cast); take the nearest rows first, then apply the threshold
+    cur.execute("""
+        SELECT source_type, source_id, content, 1 - distance AS similarity
+        FROM (
+            SELECT source_type, source_id, content, embedding <=> %s AS distance
+            FROM memory_embeddings
+            ORDER BY distance
+            LIMIT %s
+        ) nearest
+        WHERE 1 - distance > %s
+        ORDER BY distance
+    """, (query_embedding, limit, threshold))
+    return cur.fetchall()
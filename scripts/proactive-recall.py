@@ -4,89 +4,135 @@ Proactive Recall: Get relevant memories before processing a message.
 
 Usage (as a standalone):
     python proactive-recall.py "user's message here"
+    python proactive-recall.py --inject "user's message here"
     
 Output: JSON with relevant memories to inject into context.
 
 For Clawdbot integration, call this from a hook or message preprocessor.
+For per-message hooks, run a daemon that keeps the database connection warm:
+    python proactive-recall.py --daemon
+Later invocations send their query to it over ~/.clawdbot/recall.sock (one
+JSON line in, one out) and fall back to querying directly if it isn't running.
 """
 
 import os
 import sys
 import json
+import socket
+import socketserver
 from pathlib import Path
-import psycopg2
-import openai
 
-EMBEDDING_MODEL = "text-embedding-3-small"
-DB_NAME = "nova_memory"
 DEFAULT_LIMIT = 3
 DEFAULT_THRESHOLD = 0.4  # Lower threshold for proactive recall
+SOCKET_PATH = Path.home() / ".clawdbot" / "recall.sock"
+DAEMON_TIMEOUT = 30  # Seconds to wait for the daemon before giving up
 
-def get_openai_client():
-    """Get OpenAI client with API key."""
-    api_key = os.environ.get("OPENAI_API_KEY")
-    if not api_key:
-        config_path = Path.home() / ".clawdbot" / "clawdbot.json"
-        if config_path.exists():
-            with open(config_path) as f:
-                config = json.load(f)
-                api_key = config.get("skills", {}).get("entries", {}).get("openai-image-gen", {}).get("apiKey")
+class Recaller:
+    """Answers recall queries, keeping the database connection open between them."""
     
-    if not api_key:
-        return None
+    def __init__(self):
+        # Imported here, not at module level: the daemon client path in main()
+        # must stay on the stdlib so each hook call starts fast
+        from nova_embed import get_client
+        self.client = get_client()
+        self.conn = None
     
-    return openai.OpenAI(api_key=api_key)
-
-def get_embedding(client, text):
-    """Get embedding vector from OpenAI."""
-    response = client.embeddings.create(
-        model=EMBEDDING_MODEL,
-        input=text
-    )
-    return response.data[0].embedding
+    def connect(self):
+        """Return the open connection, reconnecting if it was closed."""
+        if self.conn is None or self.conn.closed:
+            from nova_embed import connect_db
+            self.conn = connect_db()
+            # Read-only queries; don't hold a transaction open between requests
+            self.conn.autocommit = True
+        return self.conn
+    
+    def close(self):
+        if self.conn is not None:
+            self.conn.close()
+            self.conn = None
+    
+    def recall(self, message, limit=DEFAULT_LIMIT, threshold=DEFAULT_THRESHOLD):
+        """Get relevant memories for a message."""
+        if not self.client:
+            return {"error": "No OpenAI API key", "memories": []}
+        
+        try:
+            from nova_embed import embed_query, search_embeddings
+            conn = self.connect()
+            query_embedding = embed_query(message, self.client)
+            results = search_embeddings(conn, query_embedding, limit, threshold)
+            
+            memories = []
+            for source_type, source_id, content, similarity in results:
+                memories.append({
+                    "source": f"{source_type}/{source_id}",
+                    "content": content[:500] + "..." if len(content) > 500 else content,
+                    "similarity": round(similarity, 3)
+                })
+            
+            return {
+                "query": message,
+                "memories": memories,
+                "count": len(memories)
+            }
+            
+        except Exception as e:
+            # Drop a possibly broken connection; the next request reconnects
+            self.close()
+            return {"error": str(e), "memories": []}
 
 def recall(message, limit=DEFAULT_LIMIT, threshold=DEFAULT_THRESHOLD):
-    """Get relevant memories for a message."""
-    client = get_openai_client()
-    if not client:
-        return {"error": "No OpenAI API key", "memories": []}
+    """Get relevant memories for a message (one-shot connection)."""
+    recaller = Recaller()
+    try:
+        return recaller.recall(message, limit, threshold)
+    finally:
+        recaller.close()
+
+class RecallHandler(socketserver.StreamRequestHandler):
+    """One request per connection: a JSON line {"message": ...} in, a JSON line out."""
+    
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline())
+            result = self.server.recaller.recall(
+                request["message"],
+                request.get("limit", DEFAULT_LIMIT),
+                request.get("threshold", DEFAULT_THRESHOLD),
+            )
+        except (ValueError, KeyError, TypeError) as e:
+            result = {"error": f"Bad request: {e}", "memories": []}
+        self.wfile.write(json.dumps(result).encode() + b"\n")
+
+def serve(socket_path=SOCKET_PATH):
+    """Run the recall daemon on a Unix socket until interrupted."""
+    socket_path.unlink(missing_ok=True)  # Left over from a previous run
+    with socketserver.UnixStreamServer(str(socket_path), RecallHandler) as server:
+        os.chmod(socket_path, 0o600)
+        server.recaller = Recaller()
+        print(f"Proactive recall listening on {socket_path}", file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.recaller.close()
+            socket_path.unlink(missing_ok=True)
+
+def recall_via_daemon(message, socket_path=SOCKET_PATH):
+    """Ask a running daemon for memories. Returns None if no daemon answers."""
+    if not socket_path.exists():
+        return None
     
     try:
-        conn = psycopg2.connect(dbname=DB_NAME, host="localhost", user="nova")
-        query_embedding = get_embedding(client, message)
-        
-        cur = conn.cursor()
-        cur.execute("""
-            SELECT 
-                source_type,
-                source_id,
-                content,
-                1 - (embedding <=> %s::vector) AS similarity
-            FROM memory_embeddings
-            WHERE 1 - (embedding <=> %s::vector) > %s
-            ORDER BY embedding <=> %s::vector
-            LIMIT %s
-        """, (query_embedding, query_embedding, threshold, query_embedding, limit))
-        
-        results = cur.fetchall()
-        conn.close()
-        
-        memories = []
-        for source_type, source_id, content, similarity in results:
-            memories.append({
-                "source": f"{source_type}/{source_id}",
-                "content": content[:500] + "..." if len(content) > 500 else content,
-                "similarity": round(similarity, 3)
-            })
-        
-        return {
-            "query": message,
-            "memories": memories,
-            "count": len(memories)
-        }
-        
-    except Exception as e:
-        return {"error": str(e), "memories": []}
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(DAEMON_TIMEOUT)
+            sock.connect(str(socket_path))
+            sock.sendall(json.dumps({"message": message}).encode() + b"\n")
+            with sock.makefile("rb") as f:
+                return json.loads(f.readline())
+    except (OSError, ValueError):
+        return None
 
 def format_for_injection(recall_result):
     """Format recall results for context injection."""
@@ -100,12 +146,21 @@ def format_for_injection(recall_result):
     return "\n".join(lines)
 
 def main():
-    if len(sys.argv) < 2:
-        print("Usage: proactive-recall.py <message>", file=sys.stderr)
+    if "--daemon" in sys.argv:
+        serve()
+        return
+    
+    words = [arg for arg in sys.argv[1:] if arg != "--inject"]
+    if not words:
+        print("Usage: proactive-recall.py [--inject] <message>", file=sys.stderr)
+        print("       proactive-recall.py --daemon", file=sys.stderr)
         sys.exit(1)
     
-    message = " ".join(sys.argv[1:])
-    result = recall(message)
+    message = " ".join(words)
+    # Prefer a warm daemon; fall back to answering in-process
+    result = recall_via_daemon(message)
+    if result is None:
+        result = recall(message)
     
     # Check for --inject flag for formatted output
     if "--inject" in sys.argv:
@@ -7,64 +7,25 @@ Usage:
     python semantic-search.py "I)ruid's health" --limit 10
 """
 
-import os
 import sys
 import json
 import argparse
-from pathlib import Path
-import psycopg2
-import openai
+from nova_embed import get_client, embed_query, connect_db, search_embeddings
 
-EMBEDDING_MODEL = "text-embedding-3-small"
-DB_NAME = "nova_memory"
-
-def get_openai_client():
-    """Get OpenAI client with API key."""
-    api_key = os.environ.get("OPENAI_API_KEY")
-    if not api_key:
-        config_path = Path.home() / ".clawdbot" / "clawdbot.json"
-        if config_path.exists():
-            with open(config_path) as f:
-                config = json.load(f)
-                api_key = config.get("skills", {}).get("entries", {}).get("openai-image-gen", {}).get("apiKey")
-    
-    if not api_key:
+def search(query, limit=5, threshold=0.5):
+    """Search memories semantically."""
+    client = get_client()
+    if not client:
         print("Error: No OpenAI API key found", file=sys.stderr)
         sys.exit(1)
     
-    return openai.OpenAI(api_key=api_key)
-
-def get_embedding(client, text):
-    """Get embedding vector from OpenAI."""
-    response = client.embeddings.create(
-        model=EMBEDDING_MODEL,
-        input=text
-    )
-    return response.data[0].embedding
-
-def search(query, limit=5, threshold=0.5):
-    """Search memories semantically."""
-    conn = psycopg2.connect(dbname=DB_NAME, host="localhost", user="nova")
-    client = get_openai_client()
+    conn = connect_db()
     
     # Get query embedding
-    query_embedding = get_embedding(client, query)
+    query_embedding = embed_query(query, client)
     
     # Search using pgvector
-    cur = conn.cursor()
-    cur.execute("""
-        SELECT 
-            source_type,
-            source_id,
-            content,
-            1 - (embedding <=> %s::vector) AS similarity
-        FROM memory_embeddings
-        WHERE 1 - (embedding <=> %s::vector) > %s
-        ORDER BY embedding <=> %s::vector
-        LIMIT %s
-    """, (query_embedding, query_embedding, threshold, query_embedding, limit))
-    
-    results = cur.fetchall()
+    results = search_embeddings(conn, query_embedding, limit, threshold)
     conn.close()
     
     return results